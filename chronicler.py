@@ -5,67 +5,149 @@ Logs keyboard input, clipboard, app activity, and screenshots to ~/chronicles
 """
 
 import os
+import re
 import sys
 import time
 import json
 import subprocess
+import queue
+import heapq
+import itertools
+import io
+import tarfile
+import tempfile
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from threading import Thread, Lock
+from threading import Thread, Event, Lock
 import signal
 import objc
-import ctypes
-import ctypes.util
 
 from pynput import keyboard
 from AppKit import (NSWorkspace, NSPasteboard, NSApplication, NSMenu, NSMenuItem,
                     NSStatusBar, NSVariableStatusItemLength, NSImage, NSApp)
-from Foundation import NSObject, NSLog
-from Quartz import CGWindowListCopyWindowInfo, kCGWindowListOptionOnScreenOnly, kCGNullWindowID
+from Foundation import NSObject, NSLog, NSTimer, NSMutableData
+from CoreFoundation import (CFFileDescriptorCreate, CFFileDescriptorEnableCallBacks,
+                            CFFileDescriptorCreateRunLoopSource, CFRunLoopAddSource,
+                            CFRunLoopGetCurrent, kCFFileDescriptorReadCallBack,
+                            kCFRunLoopCommonModes)
+from Quartz import (CGWindowListCopyWindowInfo, CGDisplayCreateImage, CGMainDisplayID,
+                    CGImageDestinationCreateWithData, CGImageDestinationAddImage,
+                    CGImageDestinationFinalize, kCGImageDestinationLossyCompressionQuality,
+                    CGBitmapContextCreate, CGColorSpaceCreateDeviceGray, CGContextDrawImage,
+                    CGRectMake, kCGImageAlphaNone, CGImageGetWidth, CGImageGetHeight,
+                    CGBitmapContextCreateImage, CGColorSpaceCreateDeviceRGB,
+                    CGContextSetInterpolationQuality, kCGImageAlphaNoneSkipLast,
+                    kCGInterpolationHigh,
+                    kCGWindowListOptionOnScreenOnly, kCGWindowListExcludeDesktopElements,
+                    kCGNullWindowID)
 import Quartz.CoreGraphics as CG
-from PIL import Image
 from markwhen_parser import MarkwhenParser
 
+try:
+    import pygit2  # Optional: commit in-process instead of forking git
+except ImportError:
+    pygit2 = None
+
 # Configuration
 CHRONICLES_DIR = Path.home() / "chronicles"
 SCREENSHOT_DIR = CHRONICLES_DIR / "screenshots"
 SCREENSHOT_INTERVAL = 600  # 10 minutes
+SCREENSHOT_QUALITY = 0.6  # Lossy encoding quality, 0.0-1.0; plenty for recall
+SCREENSHOT_MAX_SIZE = 1600  # Downscale screenshots so neither side exceeds this
+# Screenshot encodings as (UTI, file extension); the first one ImageIO can
+# encode wins. HEIC is hardware-accelerated on recent Macs and smaller than JPEG.
+SCREENSHOT_FORMATS = (("public.heic", "heic"), ("public.jpeg", "jpg"))
+SCREENSHOT_MIN_DISTANCE = 5  # Skip a screenshot whose dHash differs by fewer bits
+IDLE_THRESHOLD = 300  # Treat the system as idle after 5 minutes without input
 FLUSH_INTERVAL = 30  # Flush logs every 30 seconds
+# Clipboard polling backs off from the min to the max interval while nothing
+# is copied, and snaps back to the min on every change
+CLIPBOARD_MIN_INTERVAL = 0.2
+CLIPBOARD_MAX_INTERVAL = 5
+MAX_SESSION_CHARS = 65536  # Flush typed content once a session buffers this many bytes
+MAX_CLIPBOARD_ITEMS = 100  # Oldest clipboard/screenshot entries are dropped beyond this
+GIT_COMMIT_INTERVAL = 300  # Commit every 5 minutes (only if something changed)
+# Harden new objects and refs ("committed"; git's default syncs neither),
+# batching the object syncs into one hardware flush per git command
+# (git >= 2.36; older versions ignore both settings)
+GIT = ["git", "-c", "core.fsync=committed", "-c", "core.fsyncMethod=batch"]
+_DEBUG = bool(os.environ.get("CHRONICLER_DEBUG"))  # Log from hot paths too
 
 # Password-related apps to skip
 SENSITIVE_APPS = {
     "1Password", "LastPass", "Bitwarden", "KeePassXC", "Keeper",
     "Dashlane", "Password", "Keychain Access", "ssh", "sudo"
 }
+# One case-insensitive pattern matching any sensitive name inside an app name
+SENSITIVE_APPS_RE = re.compile("|".join(map(re.escape, SENSITIVE_APPS)), re.IGNORECASE)
+
+# Command keys, tracked for shortcuts rather than logged
+CMD_KEYS = (keyboard.Key.cmd, keyboard.Key.cmd_r)
+
+# Symbols logged for special keys, pre-encoded so key presses don't allocate
+KEY_SYMBOLS = {
+    keyboard.Key.space: b" ",
+    keyboard.Key.enter: b"\n",
+    keyboard.Key.tab: b"\t",
+    # Log backspace as arrow symbol instead of removing characters
+    keyboard.Key.backspace: "←".encode("utf-8"),
+    keyboard.Key.delete: "⌦".encode("utf-8"),
+    keyboard.Key.left: "◀".encode("utf-8"),
+    keyboard.Key.right: "▶".encode("utf-8"),
+    keyboard.Key.up: "▲".encode("utf-8"),
+    keyboard.Key.down: "▼".encode("utf-8"),
+}
 
 # Global state
 current_session = {
     "app": None,
     "window": None,
     "start_time": None,
-    "typed": [],
-    "clipboard_items": []
+    "typed": bytearray(),
+    "clipboard_items": deque(maxlen=MAX_CLIPBOARD_ITEMS)
 }
 last_clipboard = ""
-last_screenshot_time = 0
-data_lock = Lock()
-running = True
+_clipboard_change_count = None  # NSPasteboard changeCount at the last check
+_clipboard_interval = CLIPBOARD_MIN_INTERVAL  # Delay before the next check
+# (app_name, window_title) of the frontmost app, kept fresh by appActivated_
+_active_app_cache = ("Unknown", "")
+_is_sensitive_cached = False  # Sensitivity verdict for _active_app_cache
+# Last window title lookup, reused for a second to absorb rapid app switching
+_window_title_cache = {"pid": None, "time": 0.0, "title": ""}
+_last_screen_hash = None  # dHash of the last saved screenshot
+# Events from every capture source, drained by the single writer thread.
+# Only the writer thread touches current_session and the log file.
+_events = queue.Queue()
+# Typed keys (bytes) and app switches ((app_name, pid)) in the order they
+# happened. Appended without locking (deque.append is atomic) and drained
+# by the writer thread on app switches and periodic flushes, so key presses
+# never wake the writer.
+_pending_input = deque()
+_writer_thread = None
+stop_evt = Event()  # Set on shutdown; wakes every waiting worker at once
 cmd_pressed = False
+# Log files written since the last commit, relative to CHRONICLES_DIR
+_dirty_paths = set()
+_dirty_lock = Lock()
+_commit_lock = Lock()  # Serializes the periodic and final commits
+_git_repo = None  # pygit2.Repository for CHRONICLES_DIR, opened on first commit
 
 # Markwhen parser instance
 markwhen_parser = MarkwhenParser()
 
 
-def get_log_file():
+def get_log_file(now=None):
     """Get the log file for the current day (dynamic)"""
-    return CHRONICLES_DIR / f"log_{datetime.now().strftime('%Y-%m-%d')}.md"
+    now = now or datetime.now()
+    return CHRONICLES_DIR / f"log_{now.strftime('%Y-%m-%d')}.md"
 
 
-def ensure_log_file_frontmatter(log_file):
+def ensure_log_file_frontmatter(log_file, today=None):
     """Ensure log file exists with markwhen frontmatter"""
-    today = datetime.now()
-    title = f"Activity Log - {today.strftime('%Y-%m-%d')}"
+    today = today or datetime.now()
     date = today.strftime('%Y-%m-%d')
+    title = f"Activity Log - {date}"
     markwhen_parser.ensure_frontmatter(log_file, title=title, date=date)
 
 
@@ -78,80 +160,170 @@ def parse_last_event(log_file):
         return None
 
 
+class LogWriter:
+    """Append-only writer for the daily log file.
+    Holds one buffered handle on the current day's file and remembers the last
+    event written to it, so appends never reopen or reparse the file. Data
+    reaches disk on flush(), which the periodic flush drives. Only used from
+    the writer thread."""
+
+    def __init__(self):
+        self.fh = None
+        self.path = None
+        self.day = None  # Date of the open file; saves formatting its name per write
+        self.last_app = None
+        self.dirty = False
+
+    def _open(self, log_file, now):
+        """Switch to log_file, making sure it has frontmatter (once per day)"""
+        self.close()
+        ensure_log_file_frontmatter(log_file, now)
+        self.last_app = parse_last_event(log_file)
+        self.fh = open(log_file, "ab", buffering=64 * 1024)
+        self.path = log_file
+        self.day = now.date()
+
+    def write_event(self, app_name, typed_content, timestamp, now=None):
+        """Append typed content for app_name, starting a new event if needed.
+        typed_content is UTF-8 bytes and is written as-is, without decoding.
+        Mirrors MarkwhenParser.format_append."""
+        now = now or datetime.now()
+        if now.date() != self.day:
+            self._open(get_log_file(now), now)
+
+        has_text = bool(typed_content.strip())
+        if self.last_app == app_name:
+            if has_text:
+                self.fh.write(typed_content)
+        else:
+            header = markwhen_parser.format_event_header(app_name, timestamp)
+            self.fh.write(header.encode("utf-8"))
+            if has_text:
+                self.fh.write(typed_content)
+                self.fh.write(b"\n")
+            self.fh.write(b"\n")
+        self.last_app = app_name
+        self.dirty = True
+
+    def flush(self):
+        """Write buffered data to disk and mark the file for the next commit"""
+        if self.fh is None or not self.dirty:
+            return
+        self.fh.flush()
+        self.dirty = False
+        with _dirty_lock:
+            _dirty_paths.add(self.path.name)
+
+    def close(self):
+        """Flush and close the current file"""
+        if self.fh is None:
+            return
+        self.flush()
+        self.fh.close()
+        self.fh = None
+        self.path = None
+        self.day = None
+
+
+log_writer = LogWriter()
+
+
 def setup_chronicles_dir():
     """Set up the chronicles directory and git repo"""
     CHRONICLES_DIR.mkdir(exist_ok=True)
     SCREENSHOT_DIR.mkdir(exist_ok=True)
 
     # Initialize git repo if not exists
+    gitignore = CHRONICLES_DIR / ".gitignore"
     if not (CHRONICLES_DIR / ".git").exists():
         subprocess.run(["git", "init"], cwd=CHRONICLES_DIR, capture_output=True)
-        gitignore = CHRONICLES_DIR / ".gitignore"
-        gitignore.write_text("*.pyc\n__pycache__/\n.DS_Store\n")
-        subprocess.run(["git", "add", ".gitignore"], cwd=CHRONICLES_DIR, capture_output=True)
-        subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=CHRONICLES_DIR, capture_output=True)
+        gitignore.write_text("*.pyc\n__pycache__/\n.DS_Store\nscreenshots/\n")
+        subprocess.run([*GIT, "add", ".gitignore"], cwd=CHRONICLES_DIR, capture_output=True)
+        subprocess.run([*GIT, "commit", "-m", "Initial commit"], cwd=CHRONICLES_DIR, capture_output=True)
+    elif gitignore.exists():
+        # Keep screenshots out of version control in older chronicles too
+        content = gitignore.read_text()
+        if "screenshots/" not in content.split():
+            separator = "" if not content or content.endswith("\n") else "\n"
+            gitignore.write_text(f"{content}{separator}screenshots/\n")
+            subprocess.run([*GIT, "add", ".gitignore"], cwd=CHRONICLES_DIR, capture_output=True)
+            subprocess.run([*GIT, "commit", "-m", "Ignore screenshots", "--", ".gitignore"],
+                           cwd=CHRONICLES_DIR, capture_output=True)
 
     # Ensure log file exists with frontmatter
     log_file = get_log_file()
     ensure_log_file_frontmatter(log_file)
 
 
-def get_active_app():
-    """Get the currently active application and window title"""
-    workspace = NSWorkspace.sharedWorkspace()
-    active_app = workspace.activeApplication()
-    app_name = active_app.get('NSApplicationName', 'Unknown')
+def update_active_app(app):
+    """Cache the frontmost application (an NSRunningApplication) and
+    tell the writer thread to start a session for it"""
+    global _active_app_cache, _is_sensitive_cached
+    app_name = (app.localizedName() if app is not None else None) or 'Unknown'
+    pid = app.processIdentifier() if app is not None else None
+    _active_app_cache = (app_name, '')
+    _is_sensitive_cached = is_sensitive_app(app_name)
+
+    # Sensitive apps never get a session of their own
+    if not is_sensitive_context():
+        _pending_input.append((app_name, pid))
+        _events.put(("drain", None))
 
-    # Get window title using Quartz
-    window_list = CGWindowListCopyWindowInfo(kCGWindowListOptionOnScreenOnly, kCGNullWindowID)
+
+def get_active_app():
+    """Get the currently active application and window title.
+    Reads the cache maintained by NSWorkspace activation notifications;
+    the window title is only resolved on demand via get_window_title()."""
+    return _active_app_cache
+
+
+def get_window_title(pid):
+    """Look up the title of the frontmost window owned by pid using Quartz"""
+    if pid is None:
+        return ''
+
+    now = time.monotonic()
+    if _window_title_cache["pid"] == pid and now - _window_title_cache["time"] < 1:
+        return _window_title_cache["title"]
+
+    # The list is ordered front to back, so the first normal-layer window
+    # owned by the app is its front window; stop there
+    window_list = CGWindowListCopyWindowInfo(
+        kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
+        kCGNullWindowID
+    )
+    title = ''
     for window in window_list:
-        if window.get('kCGWindowOwnerName') == app_name and window.get('kCGWindowLayer') == 0:
-            window_title = window.get('kCGWindowName', '')
-            return app_name, window_title
+        if window.get('kCGWindowOwnerPID') == pid and window.get('kCGWindowLayer') == 0:
+            title = window.get('kCGWindowName', '')
+            break
 
-    return app_name, ''
+    _window_title_cache.update(pid=pid, time=now, title=title)
+    return title
 
 
-def is_sensitive_context():
-    """Check if we're in a sensitive context (password fields, etc.)"""
-    app_name, _ = get_active_app()
+def is_sensitive_app(app_name):
+    """Check if app_name matches the sensitive app list"""
+    return SENSITIVE_APPS_RE.search(app_name) is not None
 
-    # Check if app is in sensitive list
-    for sensitive in SENSITIVE_APPS:
-        if sensitive.lower() in app_name.lower():
-            return True
 
-    return False
+def is_sensitive_context():
+    """Check if we're in a sensitive context (password fields, etc.).
+    The verdict is computed once per app activation in update_active_app()."""
+    return _is_sensitive_cached
 
 
 def is_system_sleeping():
-    """Check if the system is sleeping or idle using IOKit"""
+    """Check if the system is idle (no input for IDLE_THRESHOLD seconds)"""
     try:
-        # Load IOKit framework
-        iokit = ctypes.cdll.LoadLibrary(ctypes.util.find_library('IOKit'))
-
-        # Get IOKit registry entry for power management
-        # Function signatures
-        iokit.IOServiceGetMatchingService.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
-        iokit.IOServiceGetMatchingService.restype = ctypes.c_void_p
-        iokit.IOServiceMatching.argtypes = [ctypes.c_char_p]
-        iokit.IOServiceMatching.restype = ctypes.c_void_p
-        iokit.IORegistryEntryCreateCFProperty.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32]
-        iokit.IORegistryEntryCreateCFProperty.restype = ctypes.c_void_p
-        iokit.IOObjectRelease.argtypes = [ctypes.c_void_p]
-
-        # Alternative approach: Check system idle time using CG
         idle_time = CG.CGEventSourceSecondsSinceLastEventType(
             CG.kCGEventSourceStateHIDSystemState,
             CG.kCGAnyInputEventType
         )
 
-        # If system has been idle for more than 5 minutes, consider it sleeping/idle
-        # This threshold can be adjusted based on preference
-        IDLE_THRESHOLD = 300  # 5 minutes in seconds
-
         if idle_time > IDLE_THRESHOLD:
-            NSLog(f"System idle for {idle_time:.0f} seconds - skipping screenshot")
+            if _DEBUG:
+                NSLog(f"System idle for {idle_time:.0f} seconds - skipping screenshot")
             return True
 
         return False
@@ -162,68 +334,65 @@ def is_system_sleeping():
         return False
 
 
-def append_or_create_event(app_name, typed_content, timestamp):
+def append_or_create_event(app_name, typed_content, timestamp, now=None):
     """Append to last event if same app, otherwise create new entry.
     Always uses the current day's log file."""
-    # Always get the current day's file (handles day transitions)
-    log_file = get_log_file()
     try:
-        markwhen_parser.append_event(log_file, app_name, timestamp, typed_content)
+        log_writer.write_event(app_name, typed_content, timestamp, now)
     except Exception as e:
-        NSLog(f"Error writing to log file {log_file}: {e}")
+        NSLog(f"Error writing to log file: {e}")
 
 
 def save_session(flush_typed=True):
-    """Save the current session to log file in markwhen format"""
+    """Save the current session to log file in markwhen format.
+    Runs on the writer thread, which owns current_session."""
     global current_session
 
-    if not current_session["app"]:
+    # Nothing to write: skip the clock read and day check entirely, which is
+    # the common case for the periodic flush while the user is away
+    if not current_session["app"] or not current_session["typed"]:
         return
 
-    # Always get the current day's log file (handles day transitions)
-    log_file = get_log_file()
-    ensure_log_file_frontmatter(log_file)
-
-    with data_lock:
-        timestamp_start = datetime.fromisoformat(current_session["start_time"])
-        
-        # Check if day has changed - if so, start new session
-        current_day = datetime.now().strftime('%Y-%m-%d')
-        session_day = timestamp_start.strftime('%Y-%m-%d')
-        
-        if current_day != session_day:
-            # Day changed, start fresh session for new day
-            current_session = {
-                "app": current_session["app"],  # Keep current app
-                "window": current_session.get("window"),
-                "start_time": datetime.now().isoformat(),
-                "typed": current_session["typed"],  # Keep any pending typed content
-                "clipboard_items": []
-            }
-            timestamp_start = datetime.now()
-        
-        # Get typed content
-        typed_content = "".join(current_session["typed"])
-        
-        if flush_typed and typed_content:
-            # Append or create event (always uses current day's file)
-            append_or_create_event(current_session["app"], typed_content, timestamp_start)
-            # Clear typed content after flushing
-            current_session["typed"] = []
+    now = datetime.now()
+    timestamp_start = current_session["start_time"]
+    
+    # Check if day has changed - if so, start new session
+    if now.date() != timestamp_start.date():
+        # Day changed, start fresh session for new day
+        current_session = {
+            "app": current_session["app"],  # Keep current app
+            "window": current_session.get("window"),
+            "start_time": now,
+            "typed": current_session["typed"],  # Keep any pending typed content
+            "clipboard_items": deque(maxlen=MAX_CLIPBOARD_ITEMS)
+        }
+        timestamp_start = now
+    
+    # Typed content stays UTF-8 bytes all the way to the file
+    typed_content = current_session["typed"]
+    
+    if flush_typed and typed_content:
+        # Append or create event (always uses current day's file)
+        append_or_create_event(current_session["app"], bytes(typed_content), timestamp_start, now)
+        # Clear typed content after flushing
+        current_session["typed"] = bytearray()
 
 
 def start_new_session(app_name, window_title):
     """Start a new logging session"""
     global current_session
 
-    save_session()  # Save previous session
+    # Save previous session; one with nothing typed is simply replaced,
+    # so rapid app switching doesn't touch the log file
+    if current_session["typed"]:
+        save_session()
 
     current_session = {
         "app": app_name,
         "window": window_title,
-        "start_time": datetime.now().isoformat(),
-        "typed": [],
-        "clipboard_items": []
+        "start_time": datetime.now(),
+        "typed": bytearray(),
+        "clipboard_items": deque(maxlen=MAX_CLIPBOARD_ITEMS)
     }
 
 
@@ -234,42 +403,18 @@ def on_key_press(key):
     if is_sensitive_context():
         return
 
-    app_name, window_title = get_active_app()
-
-    # Start new session if app changed
-    if current_session["app"] != app_name:
-        start_new_session(app_name, window_title)
-
-    with data_lock:
-        try:
-            # Track CMD key state
-            if key == keyboard.Key.cmd or key == keyboard.Key.cmd_r:
-                cmd_pressed = True
-                return
-
-            if hasattr(key, 'char') and key.char:
-                current_session["typed"].append(key.char)
-            elif key == keyboard.Key.space:
-                current_session["typed"].append(" ")
-            elif key == keyboard.Key.enter:
-                current_session["typed"].append("\n")
-            elif key == keyboard.Key.tab:
-                current_session["typed"].append("\t")
-            elif key == keyboard.Key.backspace:
-                # Log backspace as arrow symbol instead of removing characters
-                current_session["typed"].append("←")
-            elif key == keyboard.Key.delete:
-                # Log delete key
-                current_session["typed"].append("⌦")
-            elif key == keyboard.Key.left:
-                current_session["typed"].append("◀")
-            elif key == keyboard.Key.right:
-                current_session["typed"].append("▶")
-            elif key == keyboard.Key.up:
-                current_session["typed"].append("▲")
-            elif key == keyboard.Key.down:
-                current_session["typed"].append("▼")
-        except Exception as e:
+    try:
+        # Track CMD key state
+        if key in CMD_KEYS:
+            cmd_pressed = True
+            return
+
+        char = getattr(key, 'char', None)
+        sym = char.encode("utf-8") if char else KEY_SYMBOLS.get(key)
+        if sym:
+            _pending_input.append(sym)
+    except Exception as e:
+        if _DEBUG:
             NSLog(f"Error in on_key_press: {e}")
 
 
@@ -279,125 +424,456 @@ def on_key_release(key):
 
     try:
         # Track CMD key release
-        if key == keyboard.Key.cmd or key == keyboard.Key.cmd_r:
+        if key in CMD_KEYS:
             cmd_pressed = False
     except Exception as e:
         pass
 
 
-def monitor_clipboard():
-    """Monitor clipboard for changes"""
-    global last_clipboard
+def check_clipboard():
+    """Check the clipboard for changes (scheduler task).
+    Returns the delay before the next check."""
+    global last_clipboard, _clipboard_change_count, _clipboard_interval
 
-    pasteboard = NSPasteboard.generalPasteboard()
+    try:
+        pasteboard = NSPasteboard.generalPasteboard()
 
-    while running:
-        try:
-            # Get clipboard content
-            content = pasteboard.stringForType_("public.utf8-plain-text")
+        # Only read the clipboard when another app has written to it;
+        # the first check just records where we start
+        change_count = pasteboard.changeCount()
+        if _clipboard_change_count is None or change_count == _clipboard_change_count:
+            _clipboard_change_count = change_count
+            _clipboard_interval = min(_clipboard_interval * 2, CLIPBOARD_MAX_INTERVAL)
+            return _clipboard_interval
+        _clipboard_change_count = change_count
 
-            if content and content != last_clipboard:
-                last_clipboard = content
+        # Get clipboard content
+        content = pasteboard.stringForType_("public.utf8-plain-text")
 
-                if not is_sensitive_context():
-                    with data_lock:
-                        if current_session["app"]:
-                            current_session["clipboard_items"].append({
-                                "timestamp": datetime.now().isoformat(),
-                                "content": content[:500]  # Limit length
-                            })
+        if content and content != last_clipboard:
+            last_clipboard = content
 
-            time.sleep(1)
-        except Exception as e:
-            time.sleep(1)
+            if not is_sensitive_context():
+                _events.put(("clip", content[:500]))  # Limit length
+    except Exception as e:
+        pass
 
+    # Copies tend to come in bursts, so check again soon
+    _clipboard_interval = CLIPBOARD_MIN_INTERVAL
+    return _clipboard_interval
 
-def take_screenshot():
-    """Take a screenshot and save to screenshots directory"""
-    try:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = SCREENSHOT_DIR / f"screenshot_{timestamp}.png"
 
-        # Use screencapture command for better quality
+def screen_hash(image):
+    """Return a 64-bit difference hash (dHash) of a CGImage"""
+    # Downscale to 9x8 grayscale; each bit says whether a pixel is
+    # brighter than its right-hand neighbour
+    pixels = bytearray(9 * 8)
+    context = CGBitmapContextCreate(
+        pixels, 9, 8, 8, 9, CGColorSpaceCreateDeviceGray(), kCGImageAlphaNone
+    )
+    CGContextDrawImage(context, CGRectMake(0, 0, 9, 8), image)
+
+    value = 0
+    for row in range(0, 72, 9):
+        for col in range(row, row + 8):
+            value = (value << 1) | (pixels[col] > pixels[col + 1])
+    return value
+
+
+def downscale_image(image, max_size=SCREENSHOT_MAX_SIZE):
+    """Return image scaled down so neither side exceeds max_size pixels"""
+    width, height = CGImageGetWidth(image), CGImageGetHeight(image)
+    scale = max_size / max(width, height)
+    if scale >= 1:
+        return image
+
+    width, height = max(1, round(width * scale)), max(1, round(height * scale))
+    context = CGBitmapContextCreate(
+        None, width, height, 8, 0, CGColorSpaceCreateDeviceRGB(), kCGImageAlphaNoneSkipLast
+    )
+    CGContextSetInterpolationQuality(context, kCGInterpolationHigh)
+    CGContextDrawImage(context, CGRectMake(0, 0, width, height), image)
+    return CGBitmapContextCreateImage(context)
+
+
+def encode_image(image):
+    """Encode a CGImage in memory using the first supported SCREENSHOT_FORMATS entry.
+    Returns (bytes, extension), or (None, None) if encoding failed."""
+    for uti, extension in SCREENSHOT_FORMATS:
+        data = NSMutableData.data()
+        dest = CGImageDestinationCreateWithData(data, uti, 1, None)
+        if dest is None:
+            continue  # Format not supported on this system
+        CGImageDestinationAddImage(
+            dest, image, {kCGImageDestinationLossyCompressionQuality: SCREENSHOT_QUALITY}
+        )
+        if CGImageDestinationFinalize(dest):
+            return bytes(data), extension
+    return None, None
+
+
+def capture_with_screencapture():
+    """Fallback capture through the screencapture tool.
+    Returns JPEG bytes, or None if the capture failed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "screenshot.jpg"
         result = subprocess.run(
-            ['screencapture', '-x', '-C', str(filename)],
+            ['screencapture', '-x', '-C', '-t', 'jpg', str(path)],
             capture_output=True,
             text=True
         )
+        if result.returncode != 0:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+
+def repair_archive(path):
+    """Make the tar archive at path appendable again after a crash.
+    Anything after the last complete member is replaced with fresh
+    end-of-archive blocks."""
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return
+
+    end = 0
+    try:
+        with tarfile.open(path, "r:") as tar:
+            for info in tar:
+                data_end = info.offset_data + -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                if data_end > size:
+                    break
+                end = data_end
+    except tarfile.ReadError:
+        pass  # Empty, or cut short within the first member
+
+    footer = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+    with open(path, "r+b") as f:
+        f.seek(end)
+        if f.read(len(footer)) == footer:
+            return  # Closed cleanly
+
+        if end < size:
+            NSLog(f"Repairing {path} after an unclean shutdown")
+        if end == 0:
+            f.close()
+            path.unlink()
+            return
+        f.truncate(end)
+        f.seek(end)
+        f.write(footer)
+
+
+class ShotStore:
+    """Appends screenshots to one uncompressed tar archive per day.
+    A single growing file per day avoids creating and indexing a new file
+    for every capture. Each screenshot is flushed as soon as it is added,
+    and a member left partly written by a crash or failed write is
+    truncated away when the archive is next opened."""
+
+    def __init__(self):
+        self.tar = None
+        self.path = None
+        self.lock = Lock()  # Captures come from short-lived timer threads
+
+    def add(self, name, data, now):
+        """Store data as member name in the archive for now's day.
+        Returns the location as "archive.tar:member"."""
+        path = SCREENSHOT_DIR / f"screenshots_{now.strftime('%Y-%m-%d')}.tar"
+        with self.lock:
+            if path != self.path:
+                self._close()
+                repair_archive(path)
+                self.tar = tarfile.open(path, "a")
+                self.path = path
+
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(now.timestamp())
+            try:
+                self.tar.addfile(info, io.BytesIO(data))
+                self.tar.fileobj.flush()
+            except Exception:
+                # The archive may end mid-member; drop the handle without
+                # writing the end-of-archive blocks so the next add repairs it
+                self.tar.fileobj.close()
+                self.tar = None
+                self.path = None
+                raise
+            return f"{path}:{name}"
 
-        if result.returncode == 0 and filename.exists():
-            print(f"Screenshot saved: {filename}")
-            return filename
+    def _close(self):
+        if self.tar is not None:
+            self.tar.close()
+            self.tar = None
+            self.path = None
+
+    def close(self):
+        """Finish the current archive"""
+        with self.lock:
+            self._close()
+
+
+shot_store = ShotStore()
+
+
+def take_screenshot():
+    """Take a screenshot and add it to today's screenshot archive"""
+    global _last_screen_hash
+
+    try:
+        now = datetime.now()
+        name = f"screenshot_{now.strftime('%Y%m%d_%H%M%S')}"
+
+        # Capture the main display in-process instead of forking screencapture
+        image = CGDisplayCreateImage(CGMainDisplayID())
+        if image is None:
+            # Rare, but the screencapture tool may still succeed
+            NSLog("In-process capture failed, falling back to screencapture")
+            data, extension, image_hash = capture_with_screencapture(), "jpg", None
+            if data is None:
+                print("Screenshot failed: could not capture screen")
+                NSLog("Screenshot failed: could not capture screen")
+                return None
         else:
-            print(f"Screenshot failed: returncode={result.returncode}, stderr={result.stderr}")
-            NSLog(f"Screenshot failed: returncode={result.returncode}, stderr={result.stderr}")
-            return None
+            # Skip encoding and writing when the screen hasn't visibly changed
+            image_hash = screen_hash(image)
+            if (_last_screen_hash is not None and
+                    (image_hash ^ _last_screen_hash).bit_count() < SCREENSHOT_MIN_DISTANCE):
+                if _DEBUG:
+                    NSLog("Skipping screenshot - screen unchanged")
+                    print("Skipping screenshot - screen unchanged")
+                return None
+
+            # Encode in memory with ImageIO; lossy formats are several times
+            # smaller than PNG for screen content
+            data, extension = encode_image(downscale_image(image))
+            if data is None:
+                print(f"Screenshot failed: could not encode {name}")
+                NSLog(f"Screenshot failed: could not encode {name}")
+                return None
+
+        filename = shot_store.add(f"{name}.{extension}", data, now)
+        if image_hash is not None:
+            _last_screen_hash = image_hash
+        print(f"Screenshot saved: {filename}")
+        return filename
     except Exception as e:
         print(f"Screenshot error: {e}")
         NSLog(f"Screenshot error: {e}")
         return None
 
 
-def screenshot_loop():
-    """Periodic screenshot capture"""
-    global last_screenshot_time
-
-    while running:
-        current_time = time.time()
-        if current_time - last_screenshot_time >= SCREENSHOT_INTERVAL:
-            # Check if system is sleeping/idle before taking screenshot
-            if not is_system_sleeping():
-                filename = take_screenshot()
-                if filename:
-                    last_screenshot_time = current_time
-                    # Log screenshot in current session
-                    with data_lock:
-                        if current_session["app"]:
-                            current_session["clipboard_items"].append({
-                                "timestamp": datetime.now().isoformat(),
-                                "screenshot": str(filename)
-                            })
-            else:
-                # System is sleeping/idle, skip screenshot but reset timer to check again soon
-                NSLog("Skipping screenshot - system is idle/sleeping")
-                print("Skipping screenshot - system is idle/sleeping")
-                last_screenshot_time = current_time
-        time.sleep(10)  # Check every 10 seconds
+def capture_screenshot():
+    """Take a periodic screenshot unless the system is idle"""
+    # Check if system is sleeping/idle before taking screenshot
+    if is_system_sleeping():
+        if _DEBUG:
+            NSLog("Skipping screenshot - system is idle/sleeping")
+            print("Skipping screenshot - system is idle/sleeping")
+        return
+
+    filename = take_screenshot()
+    if filename:
+        # Log screenshot in current session
+        _events.put(("shot", str(filename)))
 
 
 def flush_logs():
-    """Periodically flush logs to ensure continuous writing"""
-    while running:
-        time.sleep(FLUSH_INTERVAL)
-        try:
+    """Ask the writer thread to flush logs to disk (scheduler task)"""
+    _events.put(("flush", None))
+
+
+def drain_pending_input():
+    """Apply buffered keys and app switches to the session (writer thread only)"""
+    while _pending_input:
+        item = _pending_input.popleft()
+        if isinstance(item, tuple):
+            app_name, pid = item
+            # Start new session if app changed
+            if current_session["app"] != app_name:
+                start_new_session(app_name, get_window_title(pid))
+            continue
+
+        current_session["typed"].extend(item)
+        # Bound memory for long sessions in a single app
+        if len(current_session["typed"]) >= MAX_SESSION_CHARS:
             save_session(flush_typed=True)
+
+
+def handle_event(kind, payload):
+    """Apply one queued event to the current session (writer thread only)"""
+    if kind == "drain":
+        drain_pending_input()
+    elif kind == "clip":
+        if current_session["app"]:
+            current_session["clipboard_items"].append({
+                "timestamp": datetime.now().isoformat(),
+                "content": payload
+            })
+    elif kind == "shot":
+        if current_session["app"]:
+            current_session["clipboard_items"].append({
+                "timestamp": datetime.now().isoformat(),
+                "screenshot": payload
+            })
+    elif kind == "flush":
+        drain_pending_input()
+        save_session(flush_typed=True)
+        log_writer.flush()
+
+
+def writer_loop():
+    """Drain the event queue until a stop event arrives"""
+    while True:
+        kind, payload = _events.get()
+        if kind == "stop":
+            drain_pending_input()
+            save_session()
+            log_writer.close()
+            return
+        try:
+            handle_event(kind, payload)
         except Exception as e:
-            NSLog(f"Error flushing logs: {e}")
+            NSLog(f"Error handling {kind} event: {e}")
+
+
+def start_writer():
+    """Start the writer thread that owns the session and log file"""
+    global _writer_thread
+    _writer_thread = Thread(target=writer_loop, daemon=True)
+    _writer_thread.start()
+
+
+def stop_writer(timeout=5):
+    """Ask the writer thread to save the session and wait for it to finish"""
+    if _writer_thread is None or not _writer_thread.is_alive():
+        return
+    _events.put(("stop", None))
+    _writer_thread.join(timeout)
+
+
+class PeriodicScheduler:
+    """Runs periodic tasks on a single thread.
+    Tasks sit in a min-heap keyed by their next fire time, so the thread
+    sleeps until the earliest one is due. A task may return a number of
+    seconds to use instead of its period for its next run."""
+
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.tasks = []
+        self._order = itertools.count()  # Tie-breaker so tasks never compare
+        self._thread = None
+
+    def add(self, period, fn):
+        """Run fn every period seconds, first after one period"""
+        heapq.heappush(self.tasks, (time.monotonic() + period, next(self._order), period, fn))
+
+    def run(self):
+        """Run due tasks until stop_event is set"""
+        while self.tasks:
+            due, order, period, fn = self.tasks[0]
+            if self.stop_event.wait(max(0.0, due - time.monotonic())):
+                return
+            try:
+                delay = fn()
+            except Exception as e:
+                NSLog(f"Scheduled task {fn.__name__} failed: {e}")
+                delay = None
+            next_due = time.monotonic() + (period if delay is None else delay)
+            heapq.heapreplace(self.tasks, (next_due, order, period, fn))
+
+    def start(self):
+        self._thread = Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+
+scheduler = PeriodicScheduler(stop_evt)
+
+
+def commit_with_pygit2(paths, commit_msg):
+    """Stage paths and commit in-process with libgit2"""
+    global _git_repo
+    if _git_repo is None:
+        _git_repo = pygit2.Repository(str(CHRONICLES_DIR))
+    repo = _git_repo
+
+    index = repo.index
+    index.read()  # Pick up changes made by any external git command
+    for path in paths:
+        index.add(path)
+    index.write()
+    tree = index.write_tree()
+
+    if repo.head_is_unborn:
+        parents = []
+    else:
+        head = repo.head.peel(pygit2.Commit)
+        if head.tree_id == tree:
+            return  # Nothing changed since the last commit
+        parents = [head.id]
+    signature = repo.default_signature
+    repo.create_commit("HEAD", signature, signature, commit_msg, tree, parents)
 
 
 def commit_to_git():
-    """Periodically commit logs to git"""
-    while running:
-        time.sleep(300)  # Commit every 5 minutes (less frequent)
+    """Commit logs written since the last commit to git (scheduler task)"""
+    global _dirty_paths
+    with _commit_lock:
+        with _dirty_lock:
+            paths, _dirty_paths = _dirty_paths, set()
+        # Skip spawning git entirely when nothing was written
+        if not paths:
+            return
+        if not commit_paths(sorted(paths)):
+            # Try these again with the next commit
+            with _dirty_lock:
+                _dirty_paths.update(paths)
+
+
+def commit_paths(paths):
+    """Stage and commit paths, returning whether that succeeded"""
+    commit_msg = f"Chronicle update {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    if pygit2 is not None:
         try:
-            subprocess.run(["git", "add", "."], cwd=CHRONICLES_DIR, capture_output=True)
-            commit_msg = f"Chronicle update {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            result = subprocess.run(
-                ["git", "commit", "-m", commit_msg],
-                cwd=CHRONICLES_DIR,
-                capture_output=True,
-                text=True
-            )
+            commit_with_pygit2(paths, commit_msg)
+            return True
         except Exception as e:
-            pass
+            NSLog(f"pygit2 commit failed, falling back to git: {e}")
+    try:
+        # Stage just the files we wrote instead of scanning the whole tree
+        result = subprocess.run([*GIT, "add", "--", *paths], cwd=CHRONICLES_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            NSLog(f"git add failed: {result.stderr.strip()}")
+            return False
+        staged = subprocess.run([*GIT, "diff", "--cached", "--quiet"], cwd=CHRONICLES_DIR)
+        if staged.returncode == 0:
+            return True  # Nothing changed since the last commit
+        result = subprocess.run(
+            [*GIT, "commit", "--quiet", "--no-verify", "-m", commit_msg],
+            cwd=CHRONICLES_DIR,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            NSLog(f"git commit failed: {result.stderr.strip()}")
+            return False
+        return True
+    except Exception as e:
+        NSLog(f"git commit failed: {e}")
+        return False
 
 
 def signal_handler(sig, frame):
     """Handle shutdown gracefully"""
-    global running
     print("\nShutting down chronicler...")
-    running = False
-    save_session()
+    stop_evt.set()
+    stop_writer()
+    commit_to_git()  # Whatever was flushed since the last periodic commit
+    shot_store.close()
     # Force exit for NSApplication
     os._exit(0)
 
@@ -448,38 +924,54 @@ class ChroniclerMenuBar(NSObject):
 
         self.statusItem.setMenu_(menu)
 
+        # Track the frontmost app via notifications instead of querying per keystroke
+        workspace = NSWorkspace.sharedWorkspace()
+        update_active_app(workspace.frontmostApplication())
+        workspace.notificationCenter().addObserver_selector_name_object_(
+            self,
+            'appActivated:',
+            'NSWorkspaceDidActivateApplicationNotification',
+            None
+        )
+
         # Start logging threads
         setup_chronicles_dir()
 
         # Take initial screenshot to confirm app is working
-        global last_screenshot_time
         print("Taking initial screenshot...")
         NSLog("Taking initial screenshot...")
         initial_screenshot = take_screenshot()
         if initial_screenshot:
-            last_screenshot_time = time.time()
             print(f"Initial screenshot saved: {initial_screenshot}")
             NSLog(f"Initial screenshot saved: {initial_screenshot}")
         else:
             print("Initial screenshot failed - check Screen Recording permissions")
             NSLog("Initial screenshot failed - check Screen Recording permissions")
 
-        clipboard_thread = Thread(target=monitor_clipboard, daemon=True)
-        screenshot_thread = Thread(target=screenshot_loop, daemon=True)
-        git_thread = Thread(target=commit_to_git, daemon=True)
-        flush_thread = Thread(target=flush_logs, daemon=True)
+        start_writer()
 
-        clipboard_thread.start()
-        screenshot_thread.start()
-        git_thread.start()
-        flush_thread.start()
+        # Periodic screenshots are driven by the app's run loop
+        NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
+            SCREENSHOT_INTERVAL,
+            self,
+            'screenshotTimer:',
+            None,
+            True
+        )
+
+        # Clipboard polling, log flushes and git commits share one thread
+        check_clipboard()
+        scheduler.add(CLIPBOARD_MIN_INTERVAL, check_clipboard)
+        scheduler.add(FLUSH_INTERVAL, flush_logs)
+        scheduler.add(GIT_COMMIT_INTERVAL, commit_to_git)
+        scheduler.start()
 
         # Start keyboard listener with error recovery
         def start_keyboard():
             retry_count = 0
             max_retries = 10
             
-            while running and retry_count < max_retries:
+            while not stop_evt.is_set() and retry_count < max_retries:
                 try:
                     print("Starting keyboard listener...")
                     NSLog("Starting keyboard listener...")
@@ -496,7 +988,7 @@ class ChroniclerMenuBar(NSObject):
                     listener.join()
                     
                     # If we get here, listener stopped
-                    if running:
+                    if not stop_evt.is_set():
                         retry_count += 1
                         error_msg = f"Keyboard listener stopped unexpectedly (attempt {retry_count}/{max_retries})"
                         NSLog(error_msg)
@@ -504,7 +996,7 @@ class ChroniclerMenuBar(NSObject):
                         
                         if retry_count < max_retries:
                             # Wait before retrying
-                            time.sleep(5)
+                            stop_evt.wait(5)
                         else:
                             # Show alert after max retries
                             from AppKit import NSAlert
@@ -534,7 +1026,7 @@ class ChroniclerMenuBar(NSObject):
                         break
                     else:
                         # Wait before retrying
-                        time.sleep(5)
+                        stop_evt.wait(5)
 
         keyboard_thread = Thread(target=start_keyboard, daemon=True)
         keyboard_thread.start()
@@ -542,6 +1034,14 @@ class ChroniclerMenuBar(NSObject):
         print("Chronicler started")
         NSLog("Chronicler started")
 
+    def screenshotTimer_(self, timer):
+        """Capture a screenshot off the main thread so the menu bar stays responsive"""
+        Thread(target=capture_screenshot, daemon=True).start()
+
+    def appActivated_(self, notification):
+        """Update the active app cache when another app comes to the front"""
+        update_active_app(notification.userInfo()['NSWorkspaceApplicationKey'])
+
     def openChronicler_(self, sender):
         """Open Chronicler folder in Finder"""
         subprocess.run(["open", str(CHRONICLES_DIR)])
@@ -552,18 +1052,41 @@ class ChroniclerMenuBar(NSObject):
 
     def applicationWillTerminate_(self, notification):
         """Clean up on quit"""
-        global running
-        running = False
-        save_session()
+        stop_evt.set()
+        stop_writer()
+        commit_to_git()  # Whatever was flushed since the last periodic commit
+        shot_store.close()
         if self.keyboard_listener:
             try:
                 self.keyboard_listener.stop()
             except:
                 pass
 
-    def dummyCallback_(self, timer):
-        """Dummy callback to allow Python signal processing"""
-        pass
+
+def install_signal_wakeup():
+    """Wake the run loop when a signal arrives so Python can run its handlers.
+    NSApplication.run() blocks in native code; set_wakeup_fd writes a byte to a
+    pipe on each signal, and a CFFileDescriptor source on that pipe calls back
+    into Python. Returns the objects that must be kept alive."""
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    os.set_blocking(write_fd, False)
+    signal.set_wakeup_fd(write_fd)
+
+    def on_wakeup(fd_ref, callback_types, info):
+        # Drain the pipe; pending Python signal handlers run as we return
+        try:
+            while os.read(read_fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+        CFFileDescriptorEnableCallBacks(fd_ref, kCFFileDescriptorReadCallBack)
+
+    fd_ref = CFFileDescriptorCreate(None, read_fd, False, on_wakeup, None)
+    CFFileDescriptorEnableCallBacks(fd_ref, kCFFileDescriptorReadCallBack)
+    source = CFFileDescriptorCreateRunLoopSource(None, fd_ref, 0)
+    CFRunLoopAddSource(CFRunLoopGetCurrent(), source, kCFRunLoopCommonModes)
+    return fd_ref, source, on_wakeup
 
 
 def check_accessibility_permission():
@@ -634,30 +1157,17 @@ def main():
     def sigint_handler(sig, frame):
         """Handle SIGINT (Ctrl-C) by terminating the NSApplication"""
         print("\nReceived interrupt, shutting down...")
-        global running
-        running = False
-        save_session()
+        stop_evt.set()
+        stop_writer()
         # Terminate the NSApplication event loop
         app.terminate_(None)
 
     signal.signal(signal.SIGINT, sigint_handler)
     signal.signal(signal.SIGTERM, sigint_handler)
 
-    # Make Python check for signals by installing a dummy timer
-    # This is needed because NSApplication.run() blocks signal delivery
-    from Foundation import NSTimer
-    def dummy_callback_(timer):
-        # Just exists to let Python process signals
-        pass
-
-    # Create a repeating timer to allow signal processing
-    NSTimer.scheduledTimerWithTimeInterval_target_selector_userInfo_repeats_(
-        0.5,  # Check every 0.5 seconds
-        delegate,
-        'dummyCallback:',
-        None,
-        True
-    )
+    # NSApplication.run() blocks signal delivery to Python; wake the run loop
+    # only when a signal actually arrives instead of polling with a timer
+    signal_wakeup = install_signal_wakeup()
 
     # Run app
     app.run()
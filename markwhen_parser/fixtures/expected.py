@@ -2,7 +2,9 @@
 Expected output data structures for markwhen parser tests
 """
 
-from typing import Dict, Any, List
+import copy
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping
 
 
 # Expected frontmatter outputs
@@ -21,145 +23,188 @@ EXPECTED_FRONTMATTER_TEST: Dict[str, Any] = {
 }
 
 
-# Expected event data structures
-def get_expected_event_basic() -> Dict[str, Any]:
+# Expected event data structures, built once at import and shared.
+# Only the outer mapping is read-only: field values stay lists/dicts so they
+# compare equal to the parser's output, so take copy_expected() to change one.
+_EVENT_BASIC: Mapping[str, Any] = MappingProxyType({
+    'date_str': '2025-01-15T10:30:00',
+    'description': 'App Name',
+    'tags': [],
+    'links': [],
+    'references': [],
+    'photos': [],
+    'properties': {},
+    'content_lines': []
+})
+
+
+def get_expected_event_basic() -> Mapping[str, Any]:
     """Expected output for basic ISO8601 event"""
-    return {
-        'date_str': '2025-01-15T10:30:00',
-        'description': 'App Name',
-        'tags': [],
-        'links': [],
-        'references': [],
-        'photos': [],
-        'properties': {},
-        'content_lines': []
-    }
-
-
-def get_expected_event_with_tags() -> Dict[str, Any]:
+    return _EVENT_BASIC
+
+
+_EVENT_WITH_TAGS: Mapping[str, Any] = MappingProxyType({
+    'date_str': '2025-01-15T10:30:00',
+    'description': 'Project task #Project1 #John',
+    'tags': ['#Project1', '#John'],
+    'links': [],
+    'references': [],
+    'photos': [],
+    'properties': {},
+    'content_lines': []
+})
+
+
+def get_expected_event_with_tags() -> Mapping[str, Any]:
     """Expected output for event with tags"""
-    return {
-        'date_str': '2025-01-15T10:30:00',
-        'description': 'Project task #Project1 #John',
-        'tags': ['#Project1', '#John'],
-        'links': [],
-        'references': [],
-        'photos': [],
-        'properties': {},
-        'content_lines': []
-    }
-
-
-def get_expected_event_with_links() -> Dict[str, Any]:
+    return _EVENT_WITH_TAGS
+
+
+_EVENT_WITH_LINKS: Mapping[str, Any] = MappingProxyType({
+    'date_str': '2025-01-15T10:30:00',
+    'description': 'Check [this link](https://example.com)',
+    'tags': [],
+    'links': [{'text': 'this link', 'url': 'https://example.com'}],
+    'references': [],
+    'photos': [],
+    'properties': {},
+    'content_lines': []
+})
+
+
+def get_expected_event_with_links() -> Mapping[str, Any]:
     """Expected output for event with links"""
-    return {
-        'date_str': '2025-01-15T10:30:00',
-        'description': 'Check [this link](https://example.com)',
-        'tags': [],
-        'links': [{'text': 'this link', 'url': 'https://example.com'}],
-        'references': [],
-        'photos': [],
-        'properties': {},
-        'content_lines': []
-    }
-
-
-def get_expected_event_with_properties() -> Dict[str, Any]:
+    return _EVENT_WITH_LINKS
+
+
+_EVENT_WITH_PROPERTIES: Mapping[str, Any] = MappingProxyType({
+    'date_str': '2025-01-15T10:30:00',
+    'description': 'Task with properties',
+    'tags': [],
+    'links': [],
+    'references': [],
+    'photos': [],
+    'properties': {
+        'contact': '[email protected]',
+        'assignees': '[Michelle, Johnathan]',
+        'location': '123 Main Street, Kansas City, MO'
+    },
+    'content_lines': []
+})
+
+
+def get_expected_event_with_properties() -> Mapping[str, Any]:
     """Expected output for event with properties"""
-    return {
-        'date_str': '2025-01-15T10:30:00',
-        'description': 'Task with properties',
-        'tags': [],
-        'links': [],
-        'references': [],
-        'photos': [],
-        'properties': {
-            'contact': '[email protected]',
-            'assignees': '[Michelle, Johnathan]',
-            'location': '123 Main Street, Kansas City, MO'
-        },
-        'content_lines': []
-    }
+    return _EVENT_WITH_PROPERTIES
+
 
+_FIRST_APP_EVENT: Mapping[str, Any] = MappingProxyType({
+    'date_str': '2025-01-15T10:30:00',
+    'description': 'First App',
+    'tags': [],
+    'links': [],
+    'references': [],
+    'photos': [],
+    'properties': {},
+    'content_lines': ['  Some content here']
+})
 
-def get_expected_first_app_event() -> Dict[str, Any]:
+
+def get_expected_first_app_event() -> Mapping[str, Any]:
     """Expected output for first app event in full timeline"""
-    return {
-        'date_str': '2025-01-15T10:30:00',
-        'description': 'First App',
-        'tags': [],
-        'links': [],
-        'references': [],
-        'photos': [],
-        'properties': {},
-        'content_lines': ['  Some content here']
-    }
-
-
-def get_expected_second_app_event() -> Dict[str, Any]:
+    return _FIRST_APP_EVENT
+
+
+_SECOND_APP_EVENT: Mapping[str, Any] = MappingProxyType({
+    'date_str': '2025-01-15T11:00:00',
+    'description': 'Second App #Work',
+    'tags': ['#Work'],
+    'links': [],
+    'references': [],
+    'photos': [],
+    'properties': {},
+    'content_lines': ['  More content', '  - [x] Task 1', '  - [ ] Task 2']
+})
+
+
+def get_expected_second_app_event() -> Mapping[str, Any]:
     """Expected output for second app event in full timeline"""
-    return {
-        'date_str': '2025-01-15T11:00:00',
-        'description': 'Second App #Work',
-        'tags': ['#Work'],
-        'links': [],
-        'references': [],
-        'photos': [],
-        'properties': {},
-        'content_lines': ['  More content', '  - [x] Task 1', '  - [ ] Task 2']
-    }
+    return _SECOND_APP_EVENT
 
 
 # Expected parse_file outputs
-def get_expected_full_timeline_parse() -> Dict[str, Any]:
-    """Expected output for parsing full_timeline.markwhen"""
-    return {
-        'frontmatter': EXPECTED_FRONTMATTER_TIMELINE,
-        'events': [
-            get_expected_first_app_event(),
-            get_expected_second_app_event()
-        ]
-    }
+_FULL_TIMELINE_PARSE: Mapping[str, Any] = MappingProxyType({
+    'frontmatter': EXPECTED_FRONTMATTER_TIMELINE,
+    'events': (
+        get_expected_first_app_event(),
+        get_expected_second_app_event()
+    )
+})
 
 
-def get_expected_last_event_parse() -> Dict[str, Any]:
+def get_expected_full_timeline_parse() -> Mapping[str, Any]:
+    """Expected output for parsing full_timeline.markwhen"""
+    return _FULL_TIMELINE_PARSE
+
+
+_LAST_EVENT_PARSE: Mapping[str, Any] = MappingProxyType({
+    'frontmatter': EXPECTED_FRONTMATTER_TEST,
+    'events': (
+        {
+            'date_str': '2025-01-15T10:30:00',
+            'description': 'First App',
+            'tags': [],
+            'links': [],
+            'references': [],
+            'photos': [],
+            'properties': {},
+            'content_lines': []
+        },
+        {
+            'date_str': '2025-01-15T11:00:00',
+            'description': 'Second App',
+            'tags': [],
+            'links': [],
+            'references': [],
+            'photos': [],
+            'properties': {},
+            'content_lines': []
+        }
+    )
+})
+
+
+def get_expected_last_event_parse() -> Mapping[str, Any]:
     """Expected output for parsing last_event_test.markwhen"""
-    return {
-        'frontmatter': EXPECTED_FRONTMATTER_TEST,
-        'events': [
-            {
-                'date_str': '2025-01-15T10:30:00',
-                'description': 'First App',
-                'tags': [],
-                'links': [],
-                'references': [],
-                'photos': [],
-                'properties': {},
-                'content_lines': []
-            },
-            {
-                'date_str': '2025-01-15T11:00:00',
-                'description': 'Second App',
-                'tags': [],
-                'links': [],
-                'references': [],
-                'photos': [],
-                'properties': {},
-                'content_lines': []
-            }
-        ]
-    }
+    return _LAST_EVENT_PARSE
+
+
+def copy_expected(expected: Any) -> Any:
+    """Deep, mutable copy of expected data, for tests that modify it"""
+    # copy.deepcopy can't copy the read-only mappings, so unwrap them here
+    if isinstance(expected, Mapping):
+        return {key: copy_expected(value) for key, value in expected.items()}
+    if isinstance(expected, (list, tuple)):
+        return [copy_expected(value) for value in expected]
+    return copy.deepcopy(expected)
+
+
+# MarkwhenEvent attributes compared by assert_event_matches, in order
+EVENT_FIELDS = (
+    'date_str', 'description', 'tags', 'links',
+    'references', 'photos', 'properties', 'content_lines'
+)
 
 
 # Helper function to compare events
-def assert_event_matches(actual_event, expected_event_dict: Dict[str, Any]):
+def assert_event_matches(actual_event, expected_event_dict: Mapping[str, Any]):
     """Assert that an actual MarkwhenEvent matches expected data"""
-    assert actual_event.date_str == expected_event_dict['date_str']
-    assert actual_event.description == expected_event_dict['description']
-    assert actual_event.tags == expected_event_dict['tags']
-    assert actual_event.links == expected_event_dict['links']
-    assert actual_event.references == expected_event_dict['references']
-    assert actual_event.photos == expected_event_dict['photos']
-    assert actual_event.properties == expected_event_dict['properties']
-    assert actual_event.content_lines == expected_event_dict['content_lines']
+    actual = (
+        actual_event.date_str, actual_event.description, actual_event.tags,
+        actual_event.links, actual_event.references, actual_event.photos,
+        actual_event.properties, actual_event.content_lines
+    )
+    expected = tuple(expected_event_dict[field] for field in EVENT_FIELDS)
+    # This module isn't assertion-rewritten by pytest, so spell out the diff
+    assert actual == expected, f"{dict(zip(EVENT_FIELDS, actual))} != {dict(expected_event_dict)}"
 
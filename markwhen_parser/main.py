@@ -4,12 +4,35 @@ Markwhen Parser - Parse and write markwhen timeline files
 Based on https://docs.markwhen.com/syntax/
 """
 
+import itertools
+import os
 import re
+from collections import deque
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator
 from pathlib import Path
 
 
+# Regex patterns for markwhen syntax, compiled once for all parsers
+_EVENT_RE = re.compile(
+    r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}|[\d/]+(?:-\d{2,4})?(?:/\d{2,4})?):\s*(.+)$'
+)
+_TAG_RE = re.compile(r'#(\w+)')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_PHOTO_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+_REFERENCE_RE = re.compile(r'@(\w+)')
+
+
+_TAIL_SIZE = 8192  # Bytes read from the end of a file to find its last event
+
+
+def _unquote(s: str) -> str:
+    """Strip whitespace and one pair of matching quotes from a property value"""
+    s = s.strip()
+    if len(s) >= 2 and s[0] == s[-1] and s[0] in ('"', "'"):
+        return s[1:-1]
+    return s
+
 
 class MarkwhenEvent:
     """Represents a markwhen event"""
@@ -32,15 +55,14 @@ class MarkwhenParser:
     """Parser for markwhen timeline files"""
     
     def __init__(self):
-        # Regex patterns for markwhen syntax
-        self.event_pattern = re.compile(
-            r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}|[\d/]+(?:-\d{2,4})?(?:/\d{2,4})?):\s*(.+)$'
-        )
-        self.tag_pattern = re.compile(r'#(\w+)')
-        self.link_pattern = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
-        self.photo_pattern = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
-        self.reference_pattern = re.compile(r'@(\w+)')
-        self.comment_pattern = re.compile(r'^\s*//.*$')
+        # Shared module-level patterns; creating a parser compiles nothing
+        self.event_pattern = _EVENT_RE
+        self.tag_pattern = _TAG_RE
+        self.link_pattern = _LINK_RE
+        self.photo_pattern = _PHOTO_RE
+        self.reference_pattern = _REFERENCE_RE
+        # (second, formatted timestamp) of the last event header
+        self._stamp_cache = (None, "")
     
     def parse_frontmatter(self, lines: List[str]) -> Tuple[Dict[str, Any], int]:
         """
@@ -48,16 +70,7 @@ class MarkwhenParser:
         Returns (frontmatter_dict, end_index)
         """
         frontmatter = {}
-        end_idx = 0
-        
-        if not lines or lines[0].strip() != "---":
-            return frontmatter, end_idx
-        
-        # Find closing ---
-        for i, line in enumerate(lines[1:], 1):
-            if line.strip() == "---":
-                end_idx = i + 1
-                break
+        end_idx = self._frontmatter_end(lines)
         
         # Parse YAML (simple key-value parsing)
         for line in lines[1:end_idx-1]:
@@ -67,22 +80,38 @@ class MarkwhenParser:
             if ':' in line:
                 key, value = line.split(':', 1)
                 key = key.strip()
-                value = value.strip().strip('"').strip("'")
+                value = _unquote(value)
                 frontmatter[key] = value
         
         return frontmatter, end_idx
     
-    def parse_event_line(self, line: str) -> Optional[MarkwhenEvent]:
+    def _frontmatter_end(self, lines: List[str]) -> int:
+        """Index of the first line after the frontmatter, or 0 if there is none"""
+        if not lines or lines[0].strip() != "---":
+            return 0
+        
+        # Find closing ---
+        for i, line in enumerate(lines[1:], 1):
+            if line.strip() == "---":
+                return i + 1
+        return 0
+    
+    def parse_event_line(self, line: str, collect_inline: bool = True) -> Optional[MarkwhenEvent]:
         """
         Parse a single event line in markwhen format.
         Examples:
         - "2025-01-15T10:30:00: App Name"
         - "2025-01/2025-03: Project task"
+        With collect_inline=False, tags/links/photos/references are left empty.
         """
         line = line.strip()
         
-        # Skip comments
-        if self.comment_pattern.match(line):
+        # Skip comments (line is already stripped, so a prefix check suffices)
+        if line.startswith('//'):
+            return None
+        
+        # Event dates start with a digit or '/'; reject anything else cheaply
+        if not line or not (line[0].isdigit() or line[0] == '/'):
             return None
         
         # Match event pattern: date: description
@@ -94,97 +123,186 @@ class MarkwhenParser:
         description = match.group(2).strip()
         
         event = MarkwhenEvent(date_str, description)
+        if not collect_inline:
+            return event
+        
+        # Each scan only runs if its marker character occurs at all; most
+        # descriptions (e.g. plain app names) contain none of them
         
         # Extract tags (include # prefix)
-        event.tags = ['#' + tag for tag in self.tag_pattern.findall(description)]
-        
-        # Extract links
-        for link_match in self.link_pattern.finditer(description):
-            event.links.append({
-                'text': link_match.group(1),
-                'url': link_match.group(2)
-            })
-        
-        # Extract photos
-        for photo_match in self.photo_pattern.finditer(description):
-            event.photos.append({
-                'alt': photo_match.group(1),
-                'url': photo_match.group(2)
-            })
+        if '#' in description:
+            event.tags = ['#' + tag for tag in self.tag_pattern.findall(description)]
+        
+        if '](' in description:
+            # Extract links
+            for link_match in self.link_pattern.finditer(description):
+                event.links.append({
+                    'text': link_match.group(1),
+                    'url': link_match.group(2)
+                })
+            
+            # Extract photos
+            for photo_match in self.photo_pattern.finditer(description):
+                event.photos.append({
+                    'alt': photo_match.group(1),
+                    'url': photo_match.group(2)
+                })
         
         # Extract references
-        event.references = self.reference_pattern.findall(description)
+        if '@' in description:
+            event.references = self.reference_pattern.findall(description)
         
         return event
     
-    def parse_file(self, file_path: Path) -> Dict[str, Any]:
+    def parse_file(self, file_path: Path, collect_content: bool = True,
+                   collect_inline: bool = True) -> Dict[str, Any]:
         """
         Parse a complete markwhen file.
         Returns dict with 'frontmatter' and 'events' keys.
+        collect_content=False skips event properties and content lines, and
+        collect_inline=False skips tags/links/photos/references, for callers
+        that only need event dates and descriptions.
         """
-        if not file_path.exists():
+        try:
+            f = open(file_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
             return {'frontmatter': {}, 'events': []}
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        with f:
+            frontmatter, lines = self._read_frontmatter(f)
+            events = list(self._iter_events(lines, collect_content, collect_inline))
         
-        # Parse frontmatter
-        frontmatter, start_idx = self.parse_frontmatter(lines)
+        return {
+            'frontmatter': frontmatter,
+            'events': events
+        }
+    
+    def _read_frontmatter(self, f, parse: bool = True) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """
+        Consume the frontmatter from an open file.
+        Returns (frontmatter_dict, remaining_lines); the remaining lines are
+        read lazily from f, so the file is never held in memory at once.
+        With parse=False the frontmatter is only skipped and the dict is empty.
+        """
+        head = []
+        first_line = f.readline()
+        if first_line:
+            head.append(first_line)
+        if first_line.strip() == "---":
+            for line in f:
+                head.append(line)
+                if line.strip() == "---":
+                    break
         
-        # Parse events
-        events = []
+        # Without a closing ---, the end index is 0 and head holds the
+        # whole file, which is then parsed as events
+        if parse:
+            frontmatter, start_idx = self.parse_frontmatter(head)
+        else:
+            frontmatter, start_idx = {}, self._frontmatter_end(head)
+        return frontmatter, itertools.chain(head[start_idx:], f)
+    
+    def _iter_events(self, lines: Iterable[str], collect_content: bool = True,
+                     collect_inline: bool = True) -> Iterator[MarkwhenEvent]:
+        """Parse events from lines following the frontmatter, yielding each when complete"""
         current_event = None
         
-        for i, line in enumerate(lines[start_idx:], start_idx):
+        for line in lines:
             line_stripped = line.strip()
             
             # Skip empty lines between events (but save current event first)
             if not line_stripped:
                 if current_event:
-                    events.append(current_event)
+                    yield current_event
                     current_event = None
                 continue
             
-            # Try to parse as event line
-            event = self.parse_event_line(line)
+            # Try to parse as event line (same cheap first-character
+            # rejection as parse_event_line, without the call)
+            first = line_stripped[0]
+            if first.isdigit() or first == '/':
+                event = self.parse_event_line(line, collect_inline)
+            else:
+                event = None
             if event:
                 if current_event:
-                    events.append(current_event)
+                    yield current_event
                 current_event = event
-            elif current_event:
+            elif current_event and collect_content:
                 # This is content for the current event
                 # Check if it's a property (key: value)
-                if ':' in line_stripped and not line_stripped.startswith('#'):
-                    parts = line_stripped.split(':', 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip()
-                        value = parts[1].strip().strip('"').strip("'")
-                        current_event.properties[key] = value
+                colon = line_stripped.find(':')
+                if colon >= 0 and first != '#':
+                    key = line_stripped[:colon].strip()
+                    value = _unquote(line_stripped[colon + 1:])
+                    current_event.properties[key] = value
                 else:
                     # Regular content line
                     current_event.content_lines.append(line.rstrip('\n'))
         
         # Add last event
         if current_event:
-            events.append(current_event)
-        
-        return {
-            'frontmatter': frontmatter,
-            'events': events
-        }
+            yield current_event
     
-    def parse_last_event(self, file_path: Path) -> Optional[str]:
+    def parse_last_event(self, file_path: Path, tail_size: int = _TAIL_SIZE) -> Optional[str]:
         """
         Parse the last event from a markwhen file and return the app name.
         This is a convenience method for the chronicler use case.
+        Only the last tail_size bytes are scanned; the whole file is parsed
+        only if no event starts within them.
         """
-        result = self.parse_file(file_path)
+        try:
+            f = open(file_path, 'rb')
+        except FileNotFoundError:
+            return None
+        
+        with f:
+            return self._last_event_in(f, file_path, tail_size)
+    
+    def _last_event_in(self, f, file_path: Path, tail_size: int) -> Optional[str]:
+        """parse_last_event on an already open binary handle f for file_path"""
+        lines, from_start = self._read_tail(f, tail_size)
+        
+        if from_start:
+            # The tail is the whole file, so skip its frontmatter
+            lines = lines[self._frontmatter_end(lines):]
+        
+        # Only the description is needed, so skip inline syntax throughout
+        for line in reversed(lines):
+            event = self.parse_event_line(line, collect_inline=False)
+            if event:
+                return event.description
+        
+        if from_start:
+            return None
+        
+        # An event longer than the tail; fall back to a full (streamed) parse,
+        # keeping only the newest event
+        with open(file_path, 'r', encoding='utf-8') as text_f:
+            _, lines = self._read_frontmatter(text_f, parse=False)
+            last_events = deque(
+                self._iter_events(lines, collect_content=False, collect_inline=False), maxlen=1
+            )
         
-        if not result['events']:
+        if not last_events:
             return None
         
-        last_event = result['events'][-1]
-        return last_event.description
+        return last_events[0].description
+    
+    def _read_tail(self, f, size: int) -> Tuple[List[str], bool]:
+        """
+        Read the complete lines within the last size bytes of binary file f.
+        Returns (lines, from_start) where from_start means the whole file was read.
+        """
+        end = f.seek(0, os.SEEK_END)
+        start = max(0, end - size)
+        f.seek(start)
+        data = f.read()
+        
+        lines = data.decode('utf-8', errors='replace').splitlines()
+        if start > 0 and lines:
+            lines = lines[1:]  # Most likely starts mid-line
+        return lines, start == 0
     
     def write_frontmatter(self, frontmatter: Dict[str, Any]) -> str:
         """Generate frontmatter YAML string"""
@@ -221,62 +339,99 @@ class MarkwhenParser:
         If file doesn't exist, create it with frontmatter.
         If file exists but has no frontmatter, add it.
         """
-        if not file_path.exists():
+        # Existing files are checked read-only and only rewritten when the
+        # frontmatter is missing; newline='' keeps CRLF content byte-for-byte
+        try:
+            f = open(file_path, 'r', encoding='utf-8', newline='')
+        except FileNotFoundError:
+            pass
+        else:
+            with f:
+                first_line = f.readline()
+                if first_line.strip() == "---":
+                    return
+                existing_content = first_line + f.read()
+            
+            # No frontmatter, prepend it to the existing content
             frontmatter = {}
             if title:
                 frontmatter['title'] = title
             if date:
                 frontmatter['date'] = date
-            else:
-                frontmatter['date'] = datetime.now().strftime('%Y-%m-%d')
             
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
                 f.write(self.write_frontmatter(frontmatter))
+                f.write(existing_content)
             return
         
-        # Check if frontmatter exists
-        with open(file_path, 'r', encoding='utf-8') as f:
-            first_line = f.readline().strip()
+        frontmatter = {}
+        if title:
+            frontmatter['title'] = title
+        if date:
+            frontmatter['date'] = date
+        else:
+            frontmatter['date'] = datetime.now().strftime('%Y-%m-%d')
         
-        if first_line != "---":
-            # No frontmatter, read existing content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                existing_content = f.read()
-            
-            # Prepend frontmatter
-            frontmatter = {}
-            if title:
-                frontmatter['title'] = title
-            if date:
-                frontmatter['date'] = date
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
+        # 'x' so a file created in the meantime is never overwritten
+        try:
+            with open(file_path, 'x', encoding='utf-8') as f:
                 f.write(self.write_frontmatter(frontmatter))
-                f.write(existing_content)
+        except FileExistsError:
+            pass
     
     def append_event(self, file_path: Path, app_name: str, timestamp: datetime, typed_content: str = ""):
         """
         Append an event to a markwhen file, or append to last event if same app.
         This is a convenience method for the chronicler use case.
         """
-        # Ensure file exists with frontmatter
-        self.ensure_frontmatter(file_path)
-        
-        # Parse to get last event
-        last_app = self.parse_last_event(file_path)
+        # One handle for the frontmatter check, last-event lookup and append
+        with self._open_with_frontmatter(file_path) as f:
+            last_app = self._last_event_in(f, file_path, _TAIL_SIZE)
+            f.seek(0, os.SEEK_END)
+            f.write(self.format_append(last_app, app_name, timestamp, typed_content).encode('utf-8'))
+    
+    def _open_with_frontmatter(self, file_path: Path):
+        """
+        Open file_path as 'r+b', first making sure it has frontmatter.
+        A file that already starts with frontmatter is opened only once.
+        """
+        try:
+            f = open(file_path, 'r+b')
+        except FileNotFoundError:
+            pass
+        else:
+            if f.readline().strip() == b"---":
+                return f
+            f.close()
         
-        # Format timestamp in markwhen format: YYYY-MM-DDTHH:MM:SS
-        timestamp_str = timestamp.strftime('%Y-%m-%dT%H:%M:%S')
+        # Missing file or no frontmatter: let ensure_frontmatter fix it up
+        self.ensure_frontmatter(file_path)
+        return open(file_path, 'r+b')
+    
+    def format_append(self, last_app: Optional[str], app_name: str, timestamp: datetime, typed_content: str = "") -> str:
+        """
+        Generate the text append_event writes to a file whose last event is last_app.
+        Lets callers holding their own file handle append without reparsing the file.
+        """
+        if last_app == app_name:
+            # Append to existing entry
+            return typed_content if typed_content.strip() else ""
         
-        with open(file_path, 'a', encoding='utf-8') as f:
-            if last_app == app_name:
-                # Append to existing entry
-                if typed_content.strip():
-                    f.write(typed_content)
-            else:
-                # Create new entry
-                f.write(f"{timestamp_str}: {app_name}\n")
-                if typed_content.strip():
-                    f.write(f"{typed_content}\n")
-                f.write("\n")
+        # Create new entry
+        lines = [self.format_event_header(app_name, timestamp)]
+        if typed_content.strip():
+            lines.append(f"{typed_content}\n")
+        lines.append("\n")
+        return "".join(lines)
+    
+    def format_event_header(self, app_name: str, timestamp: datetime) -> str:
+        """Generate the line that starts a new event for app_name."""
+        # Timestamp in markwhen format: YYYY-MM-DDTHH:MM:SS, reformatted
+        # only when the second changes
+        second = timestamp.replace(microsecond=0) if timestamp.microsecond else timestamp
+        cached = self._stamp_cache
+        if cached[0] != second:
+            cached = (second, f"{second:%Y-%m-%dT%H:%M:%S}")
+            self._stamp_cache = cached
+        return f"{cached[1]}: {app_name}\n"
 
@@ -18,7 +18,8 @@ from .fixtures.expected import (
     get_expected_event_with_properties,
     get_expected_full_timeline_parse,
     get_expected_last_event_parse,
-    assert_event_matches
+    assert_event_matches,
+    copy_expected
 )
 
 
@@ -41,6 +42,12 @@ def test_parse_frontmatter():
     # Compare with expected output
     assert frontmatter == EXPECTED_FRONTMATTER_BASIC
     assert end_idx == 4
+    
+    # Values lose one pair of matching quotes only
+    frontmatter, _ = parser.parse_frontmatter(
+        ["---\n", "a: \"x\"\n", "b: 'y'\n", "c: \"it's\"\n", "d: \"z'\n", "---\n"]
+    )
+    assert frontmatter == {'a': 'x', 'b': 'y', 'c': "it's", 'd': "\"z'"}
     print("✓ test_parse_frontmatter passed")
 
 
@@ -69,6 +76,13 @@ def test_parse_event():
     assert event is not None
     assert_event_matches(event, get_expected_event_with_links())
     
+    # Inline syntax may overlap: a photo is also a link, a URL fragment a tag
+    event = parser.parse_event_line("2025-01-15T10:30:00: See ![shot](https://x.com/a#b) @Ann")
+    assert event.photos == [{'alt': 'shot', 'url': 'https://x.com/a#b'}]
+    assert event.links == [{'text': 'shot', 'url': 'https://x.com/a#b'}]
+    assert event.tags == ['#b']
+    assert event.references == ['Ann']
+    
     # Test comment
     event = parser.parse_event_line("// This is a comment")
     assert event is None
@@ -106,6 +120,16 @@ def test_parse_file():
     for actual_event, expected_event_dict in zip(result['events'], expected['events']):
         assert_event_matches(actual_event, expected_event_dict)
     
+    # Descriptions only, without content or inline syntax
+    result = parser.parse_file(fixture_path, collect_content=False, collect_inline=False)
+    assert [e.description for e in result['events']] == [e['description'] for e in expected['events']]
+    assert all(not e.content_lines and not e.tags for e in result['events'])
+    
+    # Copies of the expected data can be changed without affecting it
+    changed = copy_expected(expected)
+    changed['events'][1]['tags'].append('#Other')
+    assert get_expected_full_timeline_parse()['events'][1]['tags'] == ['#Work']
+    
     print("✓ test_parse_file passed")
 
 
@@ -124,6 +148,35 @@ def test_parse_last_event():
     print("✓ test_parse_last_event passed")
 
 
+def test_parse_last_event_tail():
+    """Test parsing last event from the end of a large file"""
+    parser = MarkwhenParser()
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.markwhen', delete=False) as f:
+        test_file = Path(f.name)
+        f.write("---\ntitle: Test\n---\n")
+        f.write("2025-01-15T10:30:00: First App\n")
+        f.write("  typed\n" * 2000)
+        f.write("\n2025-01-15T11:00:00: Second App\n  typed\n\n")
+    
+    try:
+        # Last event found within the tail
+        assert parser.parse_last_event(test_file) == "Second App"
+        
+        # Last event starts before the tail; falls back to a full parse
+        with open(test_file, 'a', encoding='utf-8') as f:
+            f.write("  more\n" * 2000)
+        assert parser.parse_last_event(test_file) == "Second App"
+        assert parser.parse_last_event(test_file, tail_size=64) == "Second App"
+    finally:
+        test_file.unlink()
+    
+    # Missing file has no last event
+    assert parser.parse_last_event(test_file) is None
+    
+    print("✓ test_parse_last_event_tail passed")
+
+
 def test_ensure_frontmatter():
     """Test ensuring frontmatter exists"""
     parser = MarkwhenParser()
@@ -139,6 +192,30 @@ def test_ensure_frontmatter():
         assert "title: New Timeline" in content
         assert "---" in content
     
+    # Test existing file is left alone
+    parser.ensure_frontmatter(test_file, title="Other Timeline")
+    with open(test_file, 'r', encoding='utf-8') as f:
+        assert f.read() == content
+    
+    # Test frontmatter is prepended to a file without it
+    test_file.write_text("2025-01-15T10:30:00: App\n", encoding='utf-8')
+    parser.ensure_frontmatter(test_file, title="Added", date="2025-01-15")
+    with open(test_file, 'r', encoding='utf-8') as f:
+        assert f.read() == "---\ntitle: Added\ndate: 2025-01-15\n---\n2025-01-15T10:30:00: App\n"
+    
+    # Test CRLF content is kept intact when frontmatter is prepended
+    crlf = b"".join(b"2025-01-15T10:%02d:00: App%d\r\n" % (i, i) for i in range(20))
+    test_file.write_bytes(crlf)
+    parser.ensure_frontmatter(test_file, title="Added", date="2025-01-15")
+    assert test_file.read_bytes() == b"---\ntitle: Added\ndate: 2025-01-15\n---\n" + crlf
+    
+    # Test a file with frontmatter is only read, never opened for writing
+    test_file.chmod(0o444)
+    try:
+        parser.ensure_frontmatter(test_file, title="Other")
+    finally:
+        test_file.chmod(0o644)
+    
     # Cleanup
     test_file.unlink()
     print("✓ test_ensure_frontmatter passed")
@@ -181,6 +258,25 @@ def test_append_event():
     print("✓ test_append_event passed")
 
 
+def test_format_append():
+    """Test formatting appended text"""
+    parser = MarkwhenParser()
+    timestamp = datetime(2025, 1, 15, 10, 30, 0)
+    
+    # New app starts a new event
+    text = parser.format_append("App1", "App2", timestamp, "typed")
+    assert text == "2025-01-15T10:30:00: App2\ntyped\n\n"
+    
+    # Same app continues the last event
+    assert parser.format_append("App2", "App2", timestamp, "more") == "more"
+    assert parser.format_append("App2", "App2", timestamp, "  ") == ""
+    
+    # Header alone, for callers writing typed content themselves
+    assert parser.format_event_header("App2", timestamp) == "2025-01-15T10:30:00: App2\n"
+    
+    print("✓ test_format_append passed")
+
+
 def run_all_tests():
     """Run all tests"""
     print("Running markwhen parser tests...")
@@ -192,8 +288,10 @@ def run_all_tests():
         test_parse_event_with_properties()
         test_parse_file()
         test_parse_last_event()
+        test_parse_last_event_tail()
         test_ensure_frontmatter()
         test_append_event()
+        test_format_append()
         
         print()
         print("All tests passed! ✓")